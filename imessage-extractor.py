@@ -14,13 +14,165 @@ import os
 import argparse
 import sys
 import re
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 __version__ = "1.1.2"
 
+# Apple timestamps count from 2001-01-01 00:00:00 UTC
+APPLE_EPOCH_UNIX = 978307200
+
+# Translation table mapping printable ASCII bytes to themselves and
+# everything else to NUL, so blobs are classified in one C-level pass
+PRINTABLE_BYTES_TABLE = bytes(b if 0x20 <= b <= 0x7E else 0 for b in range(256))
+
+# Runs of more than 20 printable bytes in a blob translated with the table above
+PRINTABLE_RUN_RE = re.compile(rb'[^\x00]{21,}')
+
+# Prepared statements kept by the sqlite3 module per connection
+SQL_STATEMENT_CACHE_SIZE = 512
+
+# Rows fetched from the message query at a time
+FETCH_BATCH_SIZE = 1024
+
+# Max message IDs per blob lookup query
+BLOB_FETCH_BATCH_SIZE = 500
+
+# Blobs in a fetch batch needed before decoding moves to worker processes,
+# and how many blobs each worker task gets
+PARALLEL_EXTRACT_MIN_BLOBS = 256
+PARALLEL_EXTRACT_CHUNK_SIZE = 64
+
+class _SafeNameTable(dict):
+    """str.translate table keeping alphanumerics, space, '-' and '_'"""
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        # None deletes the character; entries are cached as they are seen
+        self[codepoint] = codepoint if char.isalnum() or char in ' -_' else None
+        return self[codepoint]
+
+_SAFE_NAME_TABLE = _SafeNameTable()
+
+# Lean query without the BLOB columns - most messages have plain
+# text, so blobs are fetched separately only for those that don't
+CONTACT_MESSAGES_SQL = f"""
+    SELECT
+        m.ROWID as message_id,
+        m.text,
+        m.date,
+        m.date_read,
+        m.date_delivered,
+        m.is_from_me,
+        m.service,
+        m.account,
+        m.subject,
+        m.cache_has_attachments,
+        m.balloon_bundle_id,
+        m.associated_message_type,
+        h.id as contact_identifier,
+        h.uncanonicalized_id,
+        -- Derived display columns, computed by SQLite in one pass
+        CASE WHEN m.date
+            THEN datetime(m.date / 1000000000 + {APPLE_EPOCH_UNIX}, 'unixepoch')
+            ELSE 'Unknown'
+        END as readable_date,
+        CASE WHEN m.is_from_me THEN 'Me' ELSE h.id END as sender,
+        CASE
+            WHEN m.cache_has_attachments THEN '[Attachment]'
+            WHEN m.balloon_bundle_id != '' THEN '[App Message: ' || m.balloon_bundle_id || ']'
+            WHEN m.associated_message_type THEN '[Reaction/Effect]'
+            ELSE '[No text content]'
+        END as placeholder_text
+    FROM message m
+    JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+    JOIN chat c ON cmj.chat_id = c.ROWID
+    JOIN chat_handle_join chj ON c.ROWID = chj.chat_id
+    JOIN handle h ON chj.handle_id = h.ROWID
+    WHERE h.ROWID = ?
+    ORDER BY m.date ASC
+"""
+
+# Filter the (small) handle table first, then count messages only
+# for the matching handles instead of aggregating every message
+SEARCH_CONTACTS_SQL = """
+    WITH h AS (
+        SELECT ROWID, id, uncanonicalized_id, service
+        FROM handle
+        WHERE id LIKE ? OR uncanonicalized_id LIKE ?
+    )
+    SELECT
+        h.ROWID as handle_id,
+        h.id as contact_identifier,
+        h.uncanonicalized_id,
+        h.service,
+        s.message_count,
+        s.text_message_count,
+        s.last_message_date
+    FROM h
+    JOIN (
+        SELECT
+            chj.handle_id,
+            COUNT(*) as message_count,
+            SUM(CASE WHEN m.text IS NOT NULL AND m.text != '' THEN 1 ELSE 0 END) as text_message_count,
+            MAX(m.date) as last_message_date
+        FROM chat_handle_join chj
+        JOIN chat_message_join cmj ON chj.chat_id = cmj.chat_id
+        JOIN message m ON cmj.message_id = m.ROWID
+        WHERE chj.handle_id IN (SELECT ROWID FROM h)
+        GROUP BY chj.handle_id
+    ) s ON s.handle_id = h.ROWID
+    ORDER BY s.message_count DESC
+    LIMIT ?
+"""
+
+def _scan_printable_spans(buf):
+    """Return (start, end) spans of printable ASCII runs longer than 20 bytes"""
+    classified = buf.translate(PRINTABLE_BYTES_TABLE)
+    return [match.span() for match in PRINTABLE_RUN_RE.finditer(classified)]
+
+def _extract_attributed_text(buf):
+    """Return the longest meaningful text run in an NSAttributedString blob"""
+    # Filter out class names to keep meaningful text
+    spans = [(start, end) for start, end in _scan_printable_spans(buf)
+             if not buf.startswith((b'NS', b'__kIM'), start)]
+    if not spans:
+        return None
+    
+    # Only the longest run gets sliced out and decoded
+    start, end = max(spans, key=lambda span: span[1] - span[0])
+    return buf[start:end].decode('utf-8', errors='ignore')
+
+def _decode_blob(blob):
+    """Return readable text from an attributedBody/payload_data blob"""
+    # Check if it's an NSAttributedString (Apple's format)
+    if b'NSAttributedString' in blob or b'NSMutableAttributedString' in blob:
+        # Extract readable text from NSAttributedString
+        return _extract_attributed_text(blob)
+    return blob.decode('utf-8')
+
+def _extract_blob_pair_text(blob_pair):
+    """Return the first readable text in (attributedBody, payload_data), for worker processes"""
+    for blob in blob_pair:
+        if not blob:
+            continue
+        try:
+            text = _decode_blob(blob)
+        except Exception:
+            continue
+        if text:
+            return text
+    return None
+
+@functools.lru_cache(maxsize=128)
+def _search_contacts_cached(conn, search_pattern, limit):
+    """Run the contact search, memoized per connection and pattern"""
+    cursor = conn.execute(SEARCH_CONTACTS_SQL, (search_pattern, search_pattern, limit))
+    return tuple(cursor.fetchall())
+
 class iMessageExtractor:
-    def __init__(self, db_path=None, debug=False):
+    def __init__(self, db_path=None, debug=False, build_indexes=False, workers=None):
         """Initialize the extractor with database path"""
         if db_path is None:
             self.db_path = os.path.expanduser("~/Downloads/chat.db")
@@ -29,6 +181,8 @@ class iMessageExtractor:
         
         self.conn = None
         self.debug = debug
+        self.build_indexes = build_indexes
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
         
     def log(self, message, level="INFO"):
         """Simple logging function"""
@@ -42,10 +196,17 @@ class iMessageExtractor:
             if not os.path.exists(self.db_path):
                 print(f"❌ Database file not found: {self.db_path}")
                 return False
-                
-            self.conn = sqlite3.connect(self.db_path)
+
+            if self.build_indexes:
+                self.create_indexes()
+
+            # Open read-only - we never write to chat.db
+            db_uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(db_uri, uri=True, cached_statements=SQL_STATEMENT_CACHE_SIZE)
             self.conn.row_factory = sqlite3.Row
-            
+            self.tune_connection()
+            _search_contacts_cached.cache_clear()
+
             # Test connection and show schema info
             cursor = self.conn.execute("SELECT COUNT(*) FROM message")
             message_count = cursor.fetchone()[0]
@@ -62,7 +223,66 @@ class iMessageExtractor:
         except Exception as e:
             print(f"❌ Error connecting to database: {e}")
             return False
-    
+
+    def tune_connection(self):
+        """Apply PRAGMAs that speed up the large read queries"""
+        # Bigger page cache and memory-mapped I/O for the JOIN-heavy queries
+        self.conn.executescript("""
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
+
+        # Switching to WAL needs write access, which a read-only connection
+        # does not have - fall back to just marking the connection query-only
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            self.log(f"WAL mode unavailable ({e}), using query_only", "DEBUG")
+            self.conn.execute("PRAGMA query_only=1")
+
+    def create_indexes(self):
+        """Create covering indexes for the handle -> chat -> message joins"""
+        if not os.access(self.db_path, os.W_OK):
+            print(f"⚠️  Database is not writable, skipping index creation: {self.db_path}")
+            return False
+
+        try:
+            # Needs its own writable connection, the main one is read-only.
+            # analysis_limit samples each index so ANALYZE stays cheap on
+            # large message tables while still filling sqlite_stat1
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.executescript("""
+                    CREATE INDEX IF NOT EXISTS idx_chj_handle ON chat_handle_join(handle_id, chat_id);
+                    CREATE INDEX IF NOT EXISTS idx_cmj_chat ON chat_message_join(chat_id, message_id);
+                    PRAGMA analysis_limit=1000;
+                    ANALYZE;
+                """)
+            finally:
+                conn.close()
+
+            self.log("Created query indexes and refreshed statistics")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error creating indexes: {e}")
+            return False
+
+    def explain_query(self, query, params=()):
+        """Show the SQLite query plan for debugging"""
+        if not self.debug:
+            return
+
+        try:
+            cursor = self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            print("\n🔍 Query plan:")
+            for row in cursor.fetchall():
+                print(f"  {row['detail']}")
+        except Exception as e:
+            self.log(f"Failed to explain query: {e}", "WARNING")
+
     def show_message_schema(self):
         """Show the structure of the message table for debugging"""
         try:
@@ -100,15 +320,21 @@ class iMessageExtractor:
             return None
         
         try:
-            apple_epoch = datetime(2001, 1, 1)
             seconds = apple_timestamp / 1_000_000_000
-            return apple_epoch.timestamp() + seconds
+            return APPLE_EPOCH_UNIX + seconds
         except Exception as e:
             self.log(f"Timestamp conversion error: {e}", "WARNING")
             return None
     
     def extract_message_text(self, message_row):
         """Extract text from various possible fields in the message"""
+        # Fast path: most messages have plain text, skip the candidate search
+        text = message_row.get('text') if isinstance(message_row, dict) else message_row['text']
+        if isinstance(text, str):
+            text = text.strip()
+            if text:
+                return text
+        
         # Convert Row object to dict if needed
         if not isinstance(message_row, dict):
             message_row = dict(message_row)
@@ -122,41 +348,23 @@ class iMessageExtractor:
         ]
         
         for candidate in text_candidates:
-            if candidate and str(candidate).strip():
-                # Handle potential binary data
-                if isinstance(candidate, bytes):
-                    try:
-                        # Check if it's an NSAttributedString (Apple's format)
-                        if b'NSAttributedString' in candidate or b'NSMutableAttributedString' in candidate:
-                            # Extract readable text from NSAttributedString
-                            # Look for continuous sequences of printable characters
-                            # Find all sequences of printable ASCII/UTF-8 text
-                            text_parts = []
-                            i = 0
-                            while i < len(candidate):
-                                # Skip non-printable bytes
-                                while i < len(candidate) and (candidate[i] < 0x20 or candidate[i] > 0x7E):
-                                    i += 1
-                                # Collect printable bytes
-                                start = i
-                                while i < len(candidate) and 0x20 <= candidate[i] <= 0x7E:
-                                    i += 1
-                                if i > start:
-                                    text = candidate[start:i].decode('utf-8', errors='ignore')
-                                    # Filter out class names and keep meaningful text
-                                    if len(text) > 20 and not text.startswith('NS') and not text.startswith('__kIM'):
-                                        text_parts.append(text)
-                            
-                            # Return the longest meaningful text found
-                            if text_parts:
-                                return max(text_parts, key=len)
-                        else:
-                            return candidate.decode('utf-8')
-                    except (UnicodeDecodeError, Exception) as e:
-                        self.log(f"Failed to decode binary data: {e}", "DEBUG")
-                        continue
-                elif candidate:
-                    return str(candidate).strip()
+            if not candidate:
+                continue
+            
+            # Handle potential binary data
+            if isinstance(candidate, bytes):
+                try:
+                    text = _decode_blob(candidate)
+                    if text:
+                        return text
+                except (UnicodeDecodeError, Exception) as e:
+                    self.log(f"Failed to decode binary data: {e}", "DEBUG")
+                    continue
+            else:
+                # Strip once and reuse the result
+                text = str(candidate).strip()
+                if text:
+                    return text
         
         return None
     
@@ -173,8 +381,7 @@ class iMessageExtractor:
             m.associated_message_type,
             m.message_summary_info,
             m.date,
-            m.service,
-            hex(m.payload_data) as payload_hex
+            m.service
         FROM message m
         JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
         JOIN chat c ON cmj.chat_id = c.ROWID
@@ -203,7 +410,8 @@ class iMessageExtractor:
                 print(f"  AttributedBody: {repr(msg_dict['attributedBody'])}")
                 print(f"  PayloadData length: {len(msg_dict['payload_data']) if msg_dict['payload_data'] else 0}")
                 if msg_dict['payload_data'] and len(msg_dict['payload_data']) < 200:
-                    print(f"  PayloadData hex: {msg_dict['payload_hex']}")
+                    # Hex-encode here so SQLite doesn't do it for large blobs we never print
+                    print(f"  PayloadData hex: {msg_dict['payload_data'].hex().upper()}")
     
     def search_contacts(self, search_term="", limit=50):
         """Search for contacts by name, phone, or email"""
@@ -211,52 +419,11 @@ class iMessageExtractor:
             return []
         
         try:
-            if search_term:
-                query = """
-                SELECT DISTINCT 
-                    h.ROWID as handle_id,
-                    h.id as contact_identifier,
-                    h.uncanonicalized_id,
-                    h.service,
-                    COUNT(m.ROWID) as message_count,
-                    SUM(CASE WHEN m.text IS NOT NULL AND m.text != '' THEN 1 ELSE 0 END) as text_message_count,
-                    MAX(m.date) as last_message_date
-                FROM handle h
-                LEFT JOIN chat_handle_join chj ON h.ROWID = chj.handle_id
-                LEFT JOIN chat c ON chj.chat_id = c.ROWID
-                LEFT JOIN chat_message_join cmj ON c.ROWID = cmj.chat_id
-                LEFT JOIN message m ON cmj.message_id = m.ROWID
-                WHERE (h.id LIKE ? OR h.uncanonicalized_id LIKE ?)
-                GROUP BY h.ROWID
-                HAVING message_count > 0
-                ORDER BY message_count DESC
-                LIMIT ?
-                """
-                search_pattern = f"%{search_term}%"
-                cursor = self.conn.execute(query, (search_pattern, search_pattern, limit))
-            else:
-                query = """
-                SELECT DISTINCT 
-                    h.ROWID as handle_id,
-                    h.id as contact_identifier,
-                    h.uncanonicalized_id,
-                    h.service,
-                    COUNT(m.ROWID) as message_count,
-                    SUM(CASE WHEN m.text IS NOT NULL AND m.text != '' THEN 1 ELSE 0 END) as text_message_count,
-                    MAX(m.date) as last_message_date
-                FROM handle h
-                LEFT JOIN chat_handle_join chj ON h.ROWID = chj.handle_id
-                LEFT JOIN chat c ON chj.chat_id = c.ROWID
-                LEFT JOIN chat_message_join cmj ON c.ROWID = cmj.chat_id
-                LEFT JOIN message m ON cmj.message_id = m.ROWID
-                GROUP BY h.ROWID
-                HAVING message_count > 0
-                ORDER BY message_count DESC
-                LIMIT ?
-                """
-                cursor = self.conn.execute(query, (limit,))
+            # An empty search term gives '%%', which matches every handle
+            search_pattern = f"%{search_term}%"
+            self.explain_query(SEARCH_CONTACTS_SQL, (search_pattern, search_pattern, limit))
             
-            return cursor.fetchall()
+            return _search_contacts_cached(self.conn, search_pattern, limit)
             
         except Exception as e:
             print(f"❌ Error searching contacts: {e}")
@@ -268,83 +435,13 @@ class iMessageExtractor:
             return []
         
         try:
-            # Enhanced query to get more fields for text extraction
-            query = """
-            SELECT DISTINCT
-                m.ROWID as message_id,
-                m.text,
-                m.attributedBody,
-                m.payload_data,
-                m.date,
-                m.date_read,
-                m.date_delivered,
-                m.is_from_me,
-                m.service,
-                m.account,
-                m.subject,
-                m.cache_has_attachments,
-                m.balloon_bundle_id,
-                m.associated_message_type,
-                m.message_summary_info,
-                h.id as contact_identifier,
-                h.uncanonicalized_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat c ON cmj.chat_id = c.ROWID
-            JOIN chat_handle_join chj ON c.ROWID = chj.chat_id
-            JOIN handle h ON chj.handle_id = h.ROWID
-            WHERE h.ROWID = ?
-            ORDER BY m.date ASC
-            """
-            
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            cursor = self.conn.execute(query, (handle_id,))
-            messages = cursor.fetchall()
-            
             if analyze_empty:
                 self.analyze_empty_messages(handle_id)
             
-            # Process messages with enhanced text extraction
-            processed_messages = []
-            text_found_count = 0
-            
-            for msg in messages:
-                msg_dict = dict(msg)
-                
-                # Enhanced text extraction
-                extracted_text = self.extract_message_text(msg)
-                msg_dict['extracted_text'] = extracted_text
-                
-                if extracted_text:
-                    text_found_count += 1
-                    msg_dict['display_text'] = extracted_text
-                else:
-                    # Provide more specific placeholders based on message type
-                    if msg_dict['cache_has_attachments']:
-                        msg_dict['display_text'] = '[Attachment]'
-                    elif msg_dict['balloon_bundle_id']:
-                        msg_dict['display_text'] = f'[App Message: {msg_dict["balloon_bundle_id"]}]'
-                    elif msg_dict['associated_message_type']:
-                        msg_dict['display_text'] = '[Reaction/Effect]'
-                    else:
-                        msg_dict['display_text'] = '[No text content]'
-                
-                # Convert timestamps
-                if msg_dict['date']:
-                    timestamp = self.convert_apple_timestamp(msg_dict['date'])
-                    if timestamp:
-                        msg_dict['readable_date'] = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                    else:
-                        msg_dict['readable_date'] = 'Unknown'
-                else:
-                    msg_dict['readable_date'] = 'Unknown'
-                
-                msg_dict['sender'] = 'Me' if msg_dict['is_from_me'] else msg_dict['contact_identifier']
-                processed_messages.append(msg_dict)
+            processed_messages = list(self.iter_messages(handle_id, limit))
+            text_found_count = sum(1 for msg in processed_messages if msg['extracted_text'])
             
-            print(f"📝 Text extraction summary: {text_found_count}/{len(messages)} messages have readable text")
+            print(f"📝 Text extraction summary: {text_found_count}/{len(processed_messages)} messages have readable text")
             
             return processed_messages
             
@@ -352,31 +449,144 @@ class iMessageExtractor:
             print(f"❌ Error extracting messages: {e}")
             return []
     
+    def iter_messages(self, handle_id, limit=None):
+        """Yield processed messages for a contact, fetching rows in batches"""
+        params = (handle_id,)
+        self.explain_query(CONTACT_MESSAGES_SQL, params)
+        
+        # Plain tuples instead of sqlite3.Row - avoids a dict(Row) per message
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(CONTACT_MESSAGES_SQL, params)
+        
+        # No DISTINCT in the query - a message linked to more than one of the
+        # contact's chats comes back once per chat, so skip repeated IDs here.
+        # The limit is applied here too, as it has to count unique messages.
+        seen = set()
+        pool = None
+        
+        try:
+            while True:
+                messages = cursor.fetchmany(FETCH_BATCH_SIZE)
+                if not messages:
+                    break
+                
+                # Fetch rich text blobs only for messages without plain text
+                blob_ids = [msg[0] for msg in messages
+                            if not (msg[1] and str(msg[1]).strip())]
+                blobs = self.get_message_blobs(blob_ids)
+                    
+                # Decode large sets of blobs across worker processes
+                blob_texts = {}
+                if self.workers > 1 and len(blobs) >= PARALLEL_EXTRACT_MIN_BLOBS:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=self.workers)
+                    blob_texts = self.extract_blob_texts(blobs, pool)
+                
+                for (message_id, text, date, date_read, date_delivered, is_from_me,
+                     service, account, subject, cache_has_attachments, balloon_bundle_id,
+                     associated_message_type, contact_identifier, uncanonicalized_id,
+                     readable_date, sender, placeholder_text) in messages:
+                    if message_id in seen:
+                        continue
+                    seen.add(message_id)
+                    
+                    attributed_body, payload_data = blobs.get(message_id, (None, None))
+                    msg_dict = {
+                        'message_id': message_id,
+                        'text': text,
+                        'date': date,
+                        'date_read': date_read,
+                        'date_delivered': date_delivered,
+                        'is_from_me': is_from_me,
+                        'service': service,
+                        'account': account,
+                        'subject': subject,
+                        'cache_has_attachments': cache_has_attachments,
+                        'balloon_bundle_id': balloon_bundle_id,
+                        'associated_message_type': associated_message_type,
+                        'contact_identifier': contact_identifier,
+                        'uncanonicalized_id': uncanonicalized_id,
+                        'readable_date': readable_date,
+                        'sender': sender,
+                        'placeholder_text': placeholder_text,
+                        'attributedBody': attributed_body,
+                        'payload_data': payload_data,
+                    }
+                    
+                    # Enhanced text extraction
+                    if message_id in blob_texts:
+                        extracted_text = blob_texts[message_id]
+                    else:
+                        extracted_text = self.extract_message_text(msg_dict)
+                    msg_dict['extracted_text'] = extracted_text
+                    
+                    # Fall back to a placeholder based on message type, computed in the query
+                    msg_dict['display_text'] = extracted_text or placeholder_text
+                    
+                    yield msg_dict
+                    
+                    if limit and len(seen) >= limit:
+                        return
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    
+    def extract_blob_texts(self, blobs, pool):
+        """Decode {message_id: (attributedBody, payload_data)} blobs in worker processes"""
+        try:
+            texts = pool.map(_extract_blob_pair_text, blobs.values(),
+                             chunksize=PARALLEL_EXTRACT_CHUNK_SIZE)
+            return dict(zip(blobs.keys(), texts))
+        except Exception as e:
+            # Fall back to decoding in this process
+            self.log(f"Parallel blob decoding failed: {e}", "WARNING")
+            return {}
+    
+    def get_message_blobs(self, message_ids):
+        """Fetch attributedBody/payload_data for the given message IDs"""
+        blobs = {}
+        
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(message_ids), BLOB_FETCH_BATCH_SIZE):
+            batch = message_ids[start:start + BLOB_FETCH_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT ROWID, attributedBody, payload_data FROM message WHERE ROWID IN ({placeholders})",
+                batch
+            )
+            for row in cursor:
+                blobs[row[0]] = (row[1], row[2])
+        
+        return blobs
+    
     def export_to_csv(self, messages, contact_name, output_dir="~/Downloads"):
-        """Export messages to CSV with enhanced text handling"""
+        """Export messages (any iterable, e.g. iter_messages) to CSV with enhanced text handling"""
         try:
             output_dir = os.path.expanduser(output_dir)
             os.makedirs(output_dir, exist_ok=True)
             
-            safe_name = "".join(c for c in str(contact_name) if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            safe_name = str(contact_name).translate(_SAFE_NAME_TABLE).rstrip()
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"messages_{safe_name}_{timestamp}.csv"
             filepath = os.path.join(output_dir, filename)
             
             with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
                 fieldnames = ['date', 'sender', 'message', 'service', 'has_attachments', 'message_type']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.writer(csvfile)
                 
-                writer.writeheader()
-                for msg in messages:
-                    writer.writerow({
-                        'date': msg['readable_date'],
-                        'sender': msg['sender'],
-                        'message': msg['display_text'],
-                        'service': msg['service'] or 'Unknown',
-                        'has_attachments': 'Yes' if msg['cache_has_attachments'] else 'No',
-                        'message_type': msg['balloon_bundle_id'] or 'Text'
-                    })
+                writer.writerow(fieldnames)
+                writer.writerows(
+                    (
+                        msg['readable_date'],
+                        msg['sender'],
+                        msg['display_text'],
+                        msg['service'] or 'Unknown',
+                        'Yes' if msg['cache_has_attachments'] else 'No',
+                        msg['balloon_bundle_id'] or 'Text'
+                    )
+                    for msg in messages
+                )
             
             print(f"✅ Messages exported to: {filepath}")
             return filepath
@@ -389,6 +599,7 @@ class iMessageExtractor:
         """Close database connection"""
         if self.conn:
             self.conn.close()
+            _search_contacts_cached.cache_clear()
 
 def main():
     """Main function with enhanced debugging options"""
@@ -396,13 +607,18 @@ def main():
     parser.add_argument('--db-path', help='Path to chat.db file')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     parser.add_argument('--analyze-contact', help='Analyze empty messages for a specific contact')
+    parser.add_argument('--build-indexes', action='store_true',
+                        help='Create query indexes in chat.db (modifies the file - use a copy)')
+    parser.add_argument('--workers', type=int,
+                        help='Processes used to decode rich text (default: CPU count, 1 disables)')
     
     args = parser.parse_args()
     
     print(f"🗨️  Enhanced iMessage Database Extractor v{__version__}")
     print("="*60)
     
-    extractor = iMessageExtractor(db_path=args.db_path, debug=args.debug)
+    extractor = iMessageExtractor(db_path=args.db_path, debug=args.debug,
+                                  build_indexes=args.build_indexes, workers=args.workers)
     
     if not extractor.connect_to_database():
         sys.exit(1)